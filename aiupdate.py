@@ -4,8 +4,12 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
+import functools
 import os
 import re
+import sys
+from collections import deque
 from dataclasses import dataclass, field
 from typing import Optional
 
@@ -13,8 +17,41 @@ from rich.console import Console
 from rich.live import Live
 from rich.panel import Panel
 from rich.table import Table
+from rich.text import Text
 
-console = Console()
+try:
+    import uvloop
+except ImportError:  # uvloop is not available on Windows
+    uvloop = None
+
+
+@functools.lru_cache(maxsize=None)
+def get_console() -> Console:
+    """Return the shared console, created on first use."""
+    return Console()
+
+
+# Upper bound on concurrently running subprocesses, overridable through the
+# AIUPDATE_MAX_PARALLEL environment variable.
+DEFAULT_MAX_PARALLEL = 8
+
+# Number of trailing output lines kept from each update for failure reports.
+OUTPUT_TAIL_LINES = 200
+
+
+def max_parallel() -> int:
+    """Return the configured cap on concurrently running subprocesses."""
+    try:
+        value = int(os.environ.get("AIUPDATE_MAX_PARALLEL", ""))
+    except ValueError:
+        return DEFAULT_MAX_PARALLEL
+    return max(1, value)
+
+
+# Default version pattern, plus a bytes twin used to search raw probe output
+# without decoding it first.
+DEFAULT_VERSION_REGEX = r"(\d+\.\d+\.\d+)"
+SEMVER_PATTERN = re.compile(DEFAULT_VERSION_REGEX.encode())
 
 
 @dataclass
@@ -23,8 +60,24 @@ class Tool:
     command: list[str]
     cwd: Optional[str] = None
     version_command: Optional[list[str]] = None
-    version_regex: str = r"(\d+\.\d+\.\d+)"
+    version_regex: str = DEFAULT_VERSION_REGEX
+    # Regex with (old, new) groups for updaters that print the version change
+    # themselves. A match stands in for the post-update version probe; without
+    # one the tool is probed before and after as usual.
+    output_version_regex: Optional[str] = None
+    version_pattern: re.Pattern[str] = field(init=False, repr=False)
+    output_version_pattern: Optional[re.Pattern[bytes]] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.version_pattern = re.compile(self.version_regex)
+        self.output_version_pattern = None
+        if self.output_version_regex is not None:
+            self.output_version_pattern = re.compile(self.output_version_regex.encode())
+
 
+# Local Claude Code installation, expanded once at import.
+CLAUDE_LOCAL = os.path.expanduser("~/.claude/local")
+CLAUDE_BIN = os.path.join(CLAUDE_LOCAL, "claude")
 
 TOOLS = [
     Tool(
@@ -41,12 +94,13 @@ TOOLS = [
         name="crush",
         command=["brew", "upgrade", "crush"],
         version_command=["crush", "--version"],
+        output_version_regex=r"crush (\S+) -> (\S+)",
     ),
     Tool(
         name="claude",
         command=["npm", "update"],
-        cwd=os.path.expanduser("~/.claude/local"),
-        version_command=[os.path.expanduser("~/.claude/local/claude"), "--version"],
+        cwd=CLAUDE_LOCAL,
+        version_command=[CLAUDE_BIN, "--version"],
     ),
 ]
 
@@ -55,159 +109,260 @@ TOOLS = [
 class UpdateResult:
     tool: Tool
     success: bool
-    stdout: str
-    stderr: str
+    stdout: bytes
+    stderr: bytes
     returncode: int
     old_version: Optional[str] = None
     new_version: Optional[str] = None
 
 
-async def get_version(tool: Tool, timeout: float = 5.0) -> Optional[str]:
+async def terminate(proc: asyncio.subprocess.Process, timeout: float = 5.0) -> None:
+    """Terminate a child process if it is still running, and reap it."""
+    if proc.returncode is not None:
+        return
+    with contextlib.suppress(ProcessLookupError):
+        proc.terminate()
+    try:
+        await asyncio.wait_for(proc.wait(), timeout=timeout)
+    except asyncio.TimeoutError:
+        with contextlib.suppress(ProcessLookupError):
+            proc.kill()
+        await proc.wait()
+
+
+async def get_version(
+    tool: Tool, timeout: float = 5.0, limit: Optional[asyncio.Semaphore] = None
+) -> Optional[str]:
     """Get the current version of a tool."""
     if not tool.version_command:
         return None
 
     try:
-        proc = await asyncio.create_subprocess_exec(
-            *tool.version_command,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-        try:
-            stdout, _ = await asyncio.wait_for(proc.communicate(), timeout=timeout)
-        except asyncio.TimeoutError:
-            proc.kill()
-            return None
+        async with limit if limit is not None else contextlib.nullcontext():
+            proc = await asyncio.create_subprocess_exec(
+                *tool.version_command,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+            try:
+                stdout, _ = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+            except asyncio.TimeoutError:
+                proc.kill()
+                return None
+            except asyncio.CancelledError:
+                await terminate(proc)
+                raise
 
         if proc.returncode != 0:
             return None
 
-        output = stdout.decode().strip()
-        match = re.search(tool.version_regex, output)
-        if match:
-            return match.group(1)
-        return None
+        if tool.version_regex == DEFAULT_VERSION_REGEX:
+            return scan_semver(stdout)
+        return extract_version(tool.version_pattern, stdout.decode().strip())
     except Exception:
         return None
 
 
-async def get_all_versions(tools: list[Tool]) -> dict[str, Optional[str]]:
-    """Get versions of all tools in parallel."""
+def scan_semver(output: bytes) -> Optional[str]:
+    """Find the first ``X.Y.Z`` version in raw output, decoding only the match."""
+    match = SEMVER_PATTERN.search(output)
+    if match:
+        return match.group(1).decode("ascii")
+    return None
 
-    async def get_one(tool: Tool) -> tuple[str, Optional[str]]:
-        version = await get_version(tool)
-        return tool.name, version
 
-    results = await asyncio.gather(*[get_one(t) for t in tools])
-    return dict(results)
+def extract_version(pattern: re.Pattern[str], output: str) -> Optional[str]:
+    """Extract a version from ``--version`` output."""
+    match = pattern.search(output)
+    if match:
+        return match.group(1)
+    return None
 
 
 def format_version_change(old: Optional[str], new: Optional[str]) -> str:
     """Format version change for display."""
+    # Most tools are already up to date, so check that first.
+    if old == new and old is not None:
+        return f"[dim]{old}[/dim]"
     if old is None and new is None:
         return "[dim]unknown[/dim]"
     if old is None:
         return f"[dim]?[/dim] -> [green]{new}[/green]"
     if new is None:
         return f"{old} -> [dim]?[/dim]"
-    if old == new:
-        return f"[dim]{old}[/dim]"
     return f"{old} -> [green]{new}[/green]"
 
 
-async def update_tool(tool: Tool, results: dict[str, UpdateResult | None]) -> UpdateResult:
-    """Run update command for a single tool."""
+async def read_tail(
+    stream: asyncio.StreamReader,
+    max_lines: int = OUTPUT_TAIL_LINES,
+    pattern: Optional[re.Pattern[bytes]] = None,
+) -> tuple[bytes, Optional[re.Match[bytes]]]:
+    """Drain a stream, keeping only its last ``max_lines`` lines.
+
+    Each line is also checked against ``pattern`` as it is read, so the first
+    match is found even if it has since dropped out of the tail.
+    """
+    tail: deque[bytes] = deque(maxlen=max_lines)
+    match = None
+    while True:
+        try:
+            line = await stream.readline()
+        except ValueError:  # Line longer than the stream limit; it is dropped
+            continue
+        if not line:
+            break
+        tail.append(line)
+        if pattern is not None and match is None:
+            match = pattern.search(line)
+    return b"".join(tail), match
+
+
+async def update_tool(
+    tool: Tool,
+    results: list[UpdateResult | None],
+    index: int,
+    limit: Optional[asyncio.Semaphore] = None,
+) -> UpdateResult:
+    """Run update command for a single tool, recording it at ``results[index]``."""
     try:
-        proc = await asyncio.create_subprocess_exec(
-            *tool.command,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            cwd=tool.cwd,
-        )
-        stdout, stderr = await proc.communicate()
+        async with limit if limit is not None else contextlib.nullcontext():
+            proc = await asyncio.create_subprocess_exec(
+                *tool.command,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=tool.cwd,
+            )
+            try:
+                pattern = tool.output_version_pattern
+                (stdout, out_match), (stderr, err_match) = await asyncio.gather(
+                    read_tail(proc.stdout, pattern=pattern),
+                    read_tail(proc.stderr, pattern=pattern),
+                )
+                await proc.wait()
+            except asyncio.CancelledError:
+                # Don't leave a half-finished update running after Ctrl-C.
+                await terminate(proc)
+                raise
         result = UpdateResult(
             tool=tool,
             success=proc.returncode == 0,
-            stdout=stdout.decode(),
-            stderr=stderr.decode(),
+            stdout=stdout,
+            stderr=stderr,
             returncode=proc.returncode or 0,
         )
+        match = out_match or err_match
+        if result.success and match:
+            old, new = match.groups()
+            result.old_version = old.decode(errors="replace")
+            result.new_version = new.decode(errors="replace")
     except Exception as e:
         result = UpdateResult(
             tool=tool,
             success=False,
-            stdout="",
-            stderr=str(e),
+            stdout=b"",
+            stderr=str(e).encode(),
             returncode=1,
         )
-    results[tool.name] = result
+    results[index] = result
     return result
 
 
+# Status cells, keyed by UpdateResult.success (None while running). Parsed
+# once so redraws don't go back through the markup parser.
+STATUS = {
+    None: Text.from_markup("[yellow]updating...[/yellow]"),
+    True: Text.from_markup("[green]done[/green]"),
+    False: Text.from_markup("[red]failed[/red]"),
+}
+
+
 def make_status_table(
-    results: dict[str, UpdateResult | None], show_versions: bool = False
+    results: list[UpdateResult | None], show_versions: bool = False
 ) -> Table:
-    """Create a status table showing current progress."""
+    """Create a status table showing current progress.
+
+    ``results`` holds one entry per tool, in ``TOOLS`` order.
+    """
     table = Table(show_header=False, box=None, padding=(0, 1))
     table.add_column("Tool", style="bold")
     table.add_column("Status")
     if show_versions:
         table.add_column("Version")
 
-    for tool in TOOLS:
-        result = results.get(tool.name)
-        if result is None:
-            status = "[yellow]updating...[/yellow]"
-            row = [tool.name, status]
-        elif result.success:
-            status = "[green]done[/green]"
-            row = [tool.name, status]
-            if show_versions:
+    for tool, result in zip(TOOLS, results):
+        row = [tool.name, STATUS[None if result is None else result.success]]
+        if show_versions:
+            if result is None:
+                row.append("")
+            elif result.success:
                 row.append(format_version_change(result.old_version, result.new_version))
-        else:
-            status = "[red]failed[/red]"
-            row = [tool.name, status]
-            if show_versions:
+            else:
                 row.append(f"[dim]{result.old_version or '?'}[/dim]")
-
-        if show_versions and len(row) == 2:
-            row.append("")
         table.add_row(*row)
 
     return table
 
 
 async def run_updates() -> list[UpdateResult]:
-    """Run all updates in parallel with live status display."""
-    # Phase 1: Get old versions
-    console.print("[dim]Checking current versions...[/dim]")
-    old_versions = await get_all_versions(TOOLS)
-
-    # Phase 2: Run updates with live display
-    results: dict[str, UpdateResult | None] = {tool.name: None for tool in TOOLS}
+    """Run all updates in parallel with live status display.
+
+    When the console is not a terminal, the status table is printed once at
+    the end instead of being redrawn live.
+    """
+    if hasattr(asyncio, "eager_task_factory"):  # Python 3.12+
+        # The gathered run_one tasks and the display task start running
+        # immediately, up to their first await, instead of waiting for the
+        # next loop iteration.
+        asyncio.get_running_loop().set_task_factory(asyncio.eager_task_factory)
+
+    results: list[UpdateResult | None] = [None] * len(TOOLS)
+
+    changed = asyncio.Event()
+    done_count = 0
+    limit = asyncio.Semaphore(max_parallel())
+
+    async def run_one(index: int, tool: Tool) -> UpdateResult:
+        # Probe, update and re-probe each tool as its own pipeline so a slow
+        # version check only delays its own tool, not every update.
+        nonlocal done_count
+        old_version = await get_version(tool, limit=limit)
+        result = await update_tool(tool, results, index, limit)
+        if old_version is not None:
+            result.old_version = old_version
+        if not result.success:
+            # A failed update leaves the installed version as it was.
+            result.new_version = result.old_version
+        elif result.new_version is None:
+            # Only skip the re-probe when the update output confirmed the
+            # new version.
+            result.new_version = await get_version(tool, limit=limit)
+        done_count += 1
+        changed.set()
+        return result
+
+    tasks = [run_one(i, tool) for i, tool in enumerate(TOOLS)]
+
+    console = get_console()
+    if not console.is_terminal:
+        completed = await asyncio.gather(*tasks)
+        console.print(make_status_table(results))
+        return completed
 
     with Live(make_status_table(results), console=console, refresh_per_second=4) as live:
-        tasks = [update_tool(tool, results) for tool in TOOLS]
-
         async def update_display():
-            while any(r is None for r in results.values()):
+            # Re-render only when a tool finishes; Live handles the throttling.
+            while done_count < len(TOOLS):
+                await changed.wait()
+                changed.clear()
                 live.update(make_status_table(results))
-                await asyncio.sleep(0.25)
             live.update(make_status_table(results))
 
         display_task = asyncio.create_task(update_display())
         completed = await asyncio.gather(*tasks)
         await display_task
 
-    # Phase 3: Get new versions
-    console.print("[dim]Checking new versions...[/dim]")
-    new_versions = await get_all_versions(TOOLS)
-
-    # Attach versions to results
-    for result in completed:
-        result.old_version = old_versions.get(result.tool.name)
-        result.new_version = new_versions.get(result.tool.name)
-
     return completed
 
 
@@ -217,15 +372,19 @@ def show_failures(results: list[UpdateResult]) -> None:
     if not failures:
         return
 
+    console = get_console()
     console.print()
     for result in failures:
+        # Output is kept as bytes and only decoded here, for failed tools.
+        stdout = result.stdout.decode(errors="replace")
+        stderr = result.stderr.decode(errors="replace")
         output = ""
-        if result.stdout.strip():
-            output += result.stdout
-        if result.stderr.strip():
+        if stdout.strip():
+            output += stdout
+        if stderr.strip():
             if output:
                 output += "\n"
-            output += result.stderr
+            output += stderr
 
         console.print(
             Panel(
@@ -236,16 +395,39 @@ def show_failures(results: list[UpdateResult]) -> None:
         )
 
 
+def use_pidfd_child_watcher() -> None:
+    """Reap child processes through pidfds on Linux before Python 3.12.
+
+    The default watcher on older Pythons starts a thread per child process;
+    Python 3.12+ already picks the pidfd watcher when the kernel supports it.
+    """
+    if sys.version_info >= (3, 12) or not hasattr(os, "pidfd_open"):
+        return
+    try:
+        os.close(os.pidfd_open(os.getpid()))
+    except OSError:  # Kernel older than 5.3
+        return
+    asyncio.set_child_watcher(asyncio.PidfdChildWatcher())
+
+
 def main() -> None:
     """Main entry point."""
+    console = get_console()
     console.print("[bold]Updating AI tools...[/bold]\n")
 
-    results = asyncio.run(run_updates())
+    try:
+        if uvloop is not None:
+            results = uvloop.run(run_updates())
+        else:
+            use_pidfd_child_watcher()
+            results = asyncio.run(run_updates())
+    except KeyboardInterrupt:
+        console.print("\n[yellow]Cancelled.[/yellow]")
+        raise SystemExit(130) from None
 
     # Final table with versions
     console.print()
-    final_results = {r.tool.name: r for r in results}
-    console.print(make_status_table(final_results, show_versions=True))
+    console.print(make_status_table(results, show_versions=True))
 
     # Summary
     success_count = sum(1 for r in results if r.success)